@@ -18,10 +18,10 @@ tokenizer.train(sequences)
 
 # Tokenize a sequence
 tokenized_seq = tokenizer.tokenize("ATGCGTACGTTT")
-print(tokenized_seq)
+print(tokenized_seq.tokens, tokenized_seq.ids)
 
 # Detokenize back to sequence
-detokenized_seq = tokenizer.detokenize(tokenized_seq["ids"])
+detokenized_seq = tokenizer.detokenize(tokenized_seq.ids)
 print(detokenized_seq)
 
 # Tokenize a batch of sequences
@@ -4,12 +4,12 @@ import math
 from functools import partial
 import json
 import os
-import copy
 
 from collections import namedtuple
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 
 from mamba_ssm.models.config_mamba import MambaConfig
 from mamba_ssm.modules.mamba_simple import Mamba
@@ -17,8 +17,13 @@ from mamba_ssm.modules.mamba2 import Mamba2
 from mamba_ssm.modules.mha import MHA
 from mamba_ssm.modules.mlp import GatedMLP
 from mamba_ssm.modules.block import Block
-from mamba_ssm.utils.generation import GenerationMixin
+from mamba_ssm.utils.generation import (
+    GenerationMixin,
+    InferenceParams,
+)
 from mamba_ssm.utils.hf import load_config_hf, load_state_dict_hf
+from safetensors import safe_open
+from safetensors.torch import save_file
 
 try:
     from mamba_ssm.ops.triton.layer_norm import (
@@ -30,6 +35,60 @@ except ImportError:
     RMSNorm, layer_norm_fn, rms_norm_fn = None, None, None
 
 
+CausalLMOutput = namedtuple("CausalLMOutput", ["logits"])
+DecodeGraph = namedtuple(
+    "DecodeGraph",
+    ["graph", "input_ids", "logits", "inference_params"],
+)
+
+SAFE_WEIGHTS_NAME = "model.safetensors"
+SAFE_WEIGHTS_INDEX_NAME = "model.safetensors.index.json"
+MAX_SHARD_SIZE = 5 * 1024**3  # 5 GB, the Hugging Face default
+
+
+def lm_head_argmax(hidden_states, weight):
+    """
+    Greedy next-token selection: projects hidden states onto the vocabulary
+    and returns the argmax token IDs without keeping the logits.
+
+    The projection runs in the weight's dtype, so only the hidden states
+    are cast; under torch.compile inductor can fuse the argmax into the
+    matmul epilogue. For a bf16 head on an fp32 model, convert the weight
+    once and pass the bf16 copy rather than casting it per step.
+    """
+    logits = F.linear(hidden_states.to(dtype=weight.dtype), weight)
+    return logits.argmax(dim=-1)
+
+
+def _load_safetensors_state_dict(directory, device=None, dtype=None):
+    """
+    Loads a (possibly sharded) safetensors checkpoint written by
+    MambaModel.save_pretrained. Tensors are memory-mapped and read
+    directly onto the target device.
+    """
+    index_path = os.path.join(directory, SAFE_WEIGHTS_INDEX_NAME)
+    if os.path.isfile(index_path):
+        with open(index_path) as f:
+            weight_map = json.load(f)["weight_map"]
+        shard_files = sorted(set(weight_map.values()))
+    else:
+        shard_files = [SAFE_WEIGHTS_NAME]
+
+    state_dict = {}
+    for shard_file in shard_files:
+        with safe_open(
+            os.path.join(directory, shard_file),
+            framework="pt",
+            device=str(device) if device is not None else "cpu",
+        ) as f:
+            for name in f.keys():
+                tensor = f.get_tensor(name)
+                if dtype is not None:
+                    tensor = tensor.to(dtype=dtype)
+                state_dict[name] = tensor
+    return state_dict
+
+
 def create_block(
     d_model,
     d_intermediate,
@@ -53,9 +112,7 @@ def create_block(
     factory_kwargs = {"device": device, "dtype": dtype}
     if layer_idx not in attn_layer_idx:
         # Create a copy of the config to modify
-        ssm_cfg = (
-            copy.deepcopy(ssm_cfg) if ssm_cfg is not None else {}
-        )
+        ssm_cfg = dict(ssm_cfg) if ssm_cfg else {}
         ssm_layer = ssm_cfg.pop("layer", "Mamba1")
         if ssm_layer not in ["Mamba1", "Mamba2"]:
             raise ValueError(
@@ -71,6 +128,9 @@ def create_block(
         mixer_cls = partial(
             MHA, layer_idx=layer_idx, **attn_cfg, **factory_kwargs
         )
+    # nn.LayerNorm only holds the weight/bias/eps state here: with
+    # fused_add_norm, Block runs both LayerNorm and RMSNorm through the
+    # Triton layer_norm_fn (is_rms_norm=False for LayerNorm).
     norm_cls = partial(
         nn.LayerNorm if not rms_norm else RMSNorm,
         eps=norm_epsilon,
@@ -190,6 +250,11 @@ class MixerModel(nn.Module):
         self.norm_f = (nn.LayerNorm if not rms_norm else RMSNorm)(
             d_model, eps=norm_epsilon, **factory_kwargs
         )
+        # Resolved once here instead of on every forward
+        self._is_rms_norm = RMSNorm is not None and isinstance(
+            self.norm_f, RMSNorm
+        )
+        self._has_fused_norm = layer_norm_fn is not None
 
         self.apply(
             partial(
@@ -216,11 +281,15 @@ class MixerModel(nn.Module):
             for i, layer in enumerate(self.layers)
         }
 
-    def forward(
-        self, input_ids, inference_params=None, **mixer_kwargs
+    def _run_layers(
+        self,
+        hidden_states,
+        residual,
+        inference_params,
+        **mixer_kwargs,
     ):
-        hidden_states = self.embedding(input_ids)
-        residual = None
+        # Kept as its own region so it can be compiled or graph-captured
+        # separately from the embedding and final norm
         for layer in self.layers:
             hidden_states, residual = layer(
                 hidden_states,
@@ -228,12 +297,40 @@ class MixerModel(nn.Module):
                 inference_params=inference_params,
                 **mixer_kwargs,
             )
-        if not self.fused_add_norm:
-            residual = (
-                (hidden_states + residual)
-                if residual is not None
-                else hidden_states
-            )
+        return hidden_states, residual
+
+    def forward(
+        self, input_ids, inference_params=None, **mixer_kwargs
+    ):
+        hidden_states = self.embedding(input_ids)
+        # Match the first block's norm dtype up front so its add + norm does
+        # not upcast; a no-op when the embedding was built with that dtype.
+        if len(self.layers) > 0:
+            norm_dtype = self.layers[0].norm.weight.dtype
+            if hidden_states.dtype != norm_dtype:
+                hidden_states = hidden_states.to(dtype=norm_dtype)
+        # The first block receives residual=None and starts the residual
+        # stream itself, so no zero tensor is materialized here.
+        hidden_states, residual = self._run_layers(
+            hidden_states, None, inference_params, **mixer_kwargs
+        )
+        # Even without fused_add_norm in the blocks, the final add + norm goes
+        # through the Triton kernel when it is available, which avoids
+        # materializing the summed residual and its dtype-cast copy.
+        if not (
+            self.fused_add_norm
+            or (self._has_fused_norm and hidden_states.is_cuda)
+        ):
+            if residual is None:
+                residual = hidden_states
+            elif not torch.is_grad_enabled():
+                # The last block's residual is not needed afterwards, so
+                # accumulate into it instead of allocating another
+                # activation-sized tensor. With grads on, autograd may have
+                # saved it for backward, so add out of place there.
+                residual = residual.add_(hidden_states)
+            else:
+                residual = hidden_states + residual
             hidden_states = self.norm_f(
                 residual.to(dtype=self.norm_f.weight.dtype)
             )
@@ -247,7 +344,7 @@ class MixerModel(nn.Module):
                 residual=residual,
                 prenorm=False,
                 residual_in_fp32=self.residual_in_fp32,
-                is_rms_norm=isinstance(self.norm_f, RMSNorm),
+                is_rms_norm=self._is_rms_norm,
             )
         return hidden_states
 
@@ -311,20 +408,25 @@ class MambaModel(nn.Module, GenerationMixin):
             d_model, vocab_size, bias=False, **factory_kwargs
         )
 
-        # Initialize weights and apply final processing
-        self.apply(
-            partial(
-                _init_weights,
-                n_layer=n_layer,
-                **(
-                    initializer_cfg
-                    if initializer_cfg is not None
-                    else {}
-                ),
-            )
+        # The backbone is initialized by MixerModel; only the head is new here
+        _init_weights(
+            self.lm_head,
+            n_layer=n_layer,
+            **(
+                initializer_cfg if initializer_cfg is not None else {}
+            ),
         )
         self.tie_weights()
 
+        # Opt-in torch.compile of the backbone. Compiling in place keeps the
+        # state_dict keys unchanged; fullgraph=False lets Dynamo graph-break
+        # around the Mamba custom autograd ops, and dynamic=True avoids a
+        # recompile for every new sequence length.
+        if os.environ.get("PROMETHEUS_COMPILE"):
+            self.backbone.compile(
+                mode="reduce-overhead", fullgraph=False, dynamic=True
+            )
+
     def tie_weights(self):
         """
         Ties the weights of the language model head to the embedding layer if configured to do so.
@@ -383,10 +485,112 @@ class MambaModel(nn.Module, GenerationMixin):
         )
         if num_last_tokens > 0:
             hidden_states = hidden_states[:, -num_last_tokens:]
-        lm_logits = self.lm_head(hidden_states)
-        CausalLMOutput = namedtuple("CausalLMOutput", ["logits"])
+        # Call the projection directly to skip nn.Module dispatch per decode step
+        lm_logits = F.linear(hidden_states, self.lm_head.weight)
         return CausalLMOutput(logits=lm_logits)
 
+    # no_grad rather than inference_mode: the cache allocated here must
+    # stay a normal tensor that the caller's prefill can update in place
+    @torch.no_grad()
+    def capture_decode_graph(
+        self,
+        batch_size: int,
+        max_seqlen: int,
+        dtype: torch.dtype = None,
+        n_warmups: int = 2,
+    ) -> InferenceParams:
+        """
+        Captures a CUDA graph of a single-token decode step.
+
+        Single-token decode launches many small kernels per token; replaying
+        a captured graph removes the per-kernel launch overhead. The graph
+        reads and writes the inference cache allocated here, so the prompt
+        must be prefilled with the returned inference params (and their
+        seqlen_offset advanced by the prompt length) before calling
+        decode_step. Run the prefill under torch.no_grad() or
+        torch.inference_mode().
+
+        Args:
+            batch_size (int): The batch size for decoding.
+            max_seqlen (int): The maximum sequence length, prompt included.
+            dtype (torch.dtype, optional): The dtype of the inference cache. Defaults to None.
+            n_warmups (int, optional): Eager warmup steps before capture. Defaults to 2.
+
+        Returns:
+            InferenceParams: The inference params bound to the captured graph.
+        """
+        device = self.lm_head.weight.device
+        inference_params = InferenceParams(
+            max_seqlen=max_seqlen, max_batch_size=batch_size
+        )
+        inference_params.key_value_memory_dict = (
+            self.allocate_inference_cache(
+                batch_size, max_seqlen, dtype=dtype
+            )
+        )
+        # seqlen_offset > 0 selects the single-step path in the mixers, and
+        # a lengths_per_sample tensor lets attention layers read the
+        # current position at replay time instead of baking it in
+        inference_params.seqlen_offset = 1
+        inference_params.lengths_per_sample = torch.ones(
+            batch_size, dtype=torch.int32, device=device
+        )
+        input_ids = torch.zeros(
+            (batch_size, 1), dtype=torch.long, device=device
+        )
+
+        stream = torch.cuda.Stream()
+        stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(stream):
+            for _ in range(n_warmups):
+                self(
+                    input_ids,
+                    inference_params=inference_params,
+                    num_last_tokens=1,
+                )
+        torch.cuda.current_stream().wait_stream(stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            logits = self(
+                input_ids,
+                inference_params=inference_params,
+                num_last_tokens=1,
+            ).logits
+
+        # Warmup and capture dirtied the cache; prefill overwrites it
+        inference_params.reset(max_seqlen, batch_size)
+        self._decode_graph = DecodeGraph(
+            graph, input_ids, logits, inference_params
+        )
+        return inference_params
+
+    @torch.no_grad()
+    def decode_step(self, input_ids: torch.Tensor) -> torch.Tensor:
+        """
+        Runs one decode step by replaying the graph from capture_decode_graph.
+
+        Args:
+            input_ids (torch.Tensor): The (batch_size, 1) input IDs for this step.
+
+        Returns:
+            torch.Tensor: The (batch_size, 1, vocab_size) logits. The tensor is a
+            static buffer that is overwritten by the next step.
+        """
+        decode_graph = getattr(self, "_decode_graph", None)
+        if decode_graph is None:
+            raise RuntimeError(
+                "capture_decode_graph must be called before decode_step"
+            )
+        inference_params = decode_graph.inference_params
+        decode_graph.input_ids.copy_(input_ids)
+        inference_params.lengths_per_sample.fill_(
+            inference_params.seqlen_offset
+        )
+        decode_graph.graph.replay()
+        inference_params.seqlen_offset += 1
+        return decode_graph.logits
+
     @classmethod
     def from_pretrained(
         cls,
@@ -409,27 +613,143 @@ class MambaModel(nn.Module, GenerationMixin):
         """
         config_data = load_config_hf(pretrained_model_name)
         config = MambaConfig(**config_data)
-        model = cls(config, device=device, dtype=dtype, **kwargs)
-        model.load_state_dict(
-            load_state_dict_hf(
+        # Build on the meta device so no parameter is allocated or randomly
+        # initialized only to be overwritten by the checkpoint
+        with torch.device("meta"):
+            model = cls(config, dtype=dtype, **kwargs)
+        # Non-persistent buffers (e.g. rotary inv_freq) are not in the
+        # checkpoint and would stay on meta, so build such models for real
+        meta_init = not any(
+            module._non_persistent_buffers_set
+            for module in model.modules()
+        )
+        if not meta_init:
+            model = cls(config, device=device, dtype=dtype, **kwargs)
+
+        if os.path.isfile(
+            os.path.join(pretrained_model_name, SAFE_WEIGHTS_NAME)
+        ) or os.path.isfile(
+            os.path.join(
+                pretrained_model_name, SAFE_WEIGHTS_INDEX_NAME
+            )
+        ):
+            state_dict = _load_safetensors_state_dict(
                 pretrained_model_name, device=device, dtype=dtype
             )
-        )
+        else:
+            state_dict = load_state_dict_hf(
+                pretrained_model_name, device=device, dtype=dtype
+            )
+        # save_pretrained drops the tied head, safetensors cannot store
+        # shared tensors
+        if (
+            config.tie_embeddings
+            and "lm_head.weight" not in state_dict
+        ):
+            state_dict["lm_head.weight"] = state_dict[
+                "backbone.embedding.weight"
+            ]
+        if not meta_init:
+            model.load_state_dict(state_dict, strict=True)
+            return model
+
+        # assign=True takes the checkpoint tensors as they are: keep the
+        # dtype each parameter was built with, and the attributes mamba_ssm
+        # sets on them (_no_weight_decay, _no_reinit) for the optimizer
+        expected = model.state_dict()
+        state_dict = {
+            name: (
+                tensor.to(dtype=expected[name].dtype)
+                if name in expected
+                else tensor
+            )
+            for name, tensor in state_dict.items()
+        }
+        param_attrs = {
+            name: dict(param.__dict__)
+            for name, param in model.named_parameters()
+            if param.__dict__
+        }
+        model.load_state_dict(state_dict, strict=True, assign=True)
+        # assign=True replaces parameters one by one, which unties them
+        model.tie_weights()
+        for name, param in model.named_parameters():
+            param.__dict__.update(param_attrs.get(name, {}))
+        # The checkpoint tensors were loaded onto device already; no blanket
+        # dtype cast, which would also cast the fp32 A_log and D
         return model
 
-    def save_pretrained(self, save_directory: str):
+    def save_pretrained(
+        self,
+        save_directory: str,
+        max_shard_size: int = MAX_SHARD_SIZE,
+    ):
         """
         Saves the model and its configuration to a directory.
 
+        Weights are written as safetensors, split into shards of at most
+        max_shard_size bytes with a model.safetensors.index.json when they
+        do not fit in a single file.
+
         Args:
             save_directory (str): The directory to save the model and configuration.
+            max_shard_size (int, optional): Maximum size of a weight shard in bytes. Defaults to 5 GB.
         """
         # Ensure save_directory exists
         os.makedirs(save_directory, exist_ok=True)
 
+        # safetensors refuses shared storage, so drop the tied head; it is
+        # re-tied from the embedding on load
+        state_dict = self.state_dict()
+        if self.config.tie_embeddings:
+            state_dict.pop("lm_head.weight", None)
+
+        # Group tensors into shards of at most max_shard_size bytes
+        shards, shard_sizes = [{}], [0]
+        for name, tensor in state_dict.items():
+            nbytes = tensor.numel() * tensor.element_size()
+            if (
+                shards[-1]
+                and shard_sizes[-1] + nbytes > max_shard_size
+            ):
+                shards.append({})
+                shard_sizes.append(0)
+            shards[-1][name] = tensor.contiguous()
+            shard_sizes[-1] += nbytes
+
         # Save the model's state_dict
-        model_path = os.path.join(save_directory, "pytorch_model.bin")
-        torch.save(self.state_dict(), model_path)
+        if len(shards) == 1:
+            save_file(
+                shards[0],
+                os.path.join(save_directory, SAFE_WEIGHTS_NAME),
+                metadata={"format": "pt"},
+            )
+        else:
+            weight_map = {}
+            for i, shard in enumerate(shards, start=1):
+                shard_file = (
+                    f"model-{i:05d}-of-{len(shards):05d}.safetensors"
+                )
+                save_file(
+                    shard,
+                    os.path.join(save_directory, shard_file),
+                    metadata={"format": "pt"},
+                )
+                weight_map.update(
+                    {name: shard_file for name in shard}
+                )
+            index_path = os.path.join(
+                save_directory, SAFE_WEIGHTS_INDEX_NAME
+            )
+            with open(index_path, "w") as f:
+                json.dump(
+                    {
+                        "metadata": {"total_size": sum(shard_sizes)},
+                        "weight_map": weight_map,
+                    },
+                    f,
+                    indent=4,
+                )
 
         # Save the configuration of the model
         config_path = os.path.join(save_directory, "config.json")
@@ -1,10 +1,12 @@
+import functools
+import os
 from typing import Dict, List
 
+import numpy as np
 import tiktoken
 import torch
 import torch.nn as nn
 from loguru import logger
-from torch.nn.utils.rnn import pad_sequence
 
 from prometheus.tokenizer import GenomeTokenizer
 
@@ -39,18 +41,34 @@ class TikTokenizer:
         Returns:
             int: The number of tokens in the text string.
         """
-        """Returns the number of tokens in a text string."""
-        num_tokens = len(self.encoding.encode(string))
-        return num_tokens
+        return len(
+            self.encoding.encode(string, disallowed_special=())
+        )
 
     def tokenize(self, string: str) -> List[int]:
-        return self.encoding.encode(string)
+        return self.encoding.encode(string, disallowed_special=())
 
     def detokenize(self, tokens: List[int]) -> str:
         return self.encoding.decode(tokens)
 
-    def batch_encode(self, text: List[str]) -> int:
-        return self.encoding.encode_batch(text)
+    def batch_encode(
+        self, text: List[str], num_threads: int = None
+    ) -> List[List[int]]:
+        """
+        Encodes a batch of text strings in parallel.
+
+        Args:
+            text (List[str]): The input text strings.
+            num_threads (int, optional): Number of encoder threads. Defaults to min(8, os.cpu_count()).
+
+        Returns:
+            List[List[int]]: The token IDs for each string.
+        """
+        if num_threads is None:
+            num_threads = min(8, os.cpu_count() or 1)
+        return self.encoding.encode_batch(
+            text, num_threads=num_threads, disallowed_special=()
+        )
 
 
 class TextEmbeddingModel(nn.Module):
@@ -86,7 +104,7 @@ class TextEmbeddingModel(nn.Module):
 class GenomicEmbeddingModel(nn.Module):
     def __init__(
         self,
-        vocab_size_genomic: int = 5000,
+        vocab_size_genomic: int = 1024,
         genomic_embedding_dim: int = 128,
     ):
         super(GenomicEmbeddingModel, self).__init__()
@@ -117,6 +135,87 @@ class GenomicEmbeddingModel(nn.Module):
         return genomic_embeddings
 
 
+def _pad_token_ids(
+    tokens: List[List[int]],
+    device: torch.device,
+    pad_id: int = 0,
+) -> torch.Tensor:
+    """
+    Pads a batch of token ID lists into a single (batch, max_len) int64
+    tensor on the given device.
+
+    The batch is filled into one preallocated NumPy array rather than one
+    small tensor per sequence; on CUDA the host buffer is pinned and copied
+    asynchronously.
+
+    Args:
+        tokens (List[List[int]]): Token IDs for each sequence.
+        device (torch.device): Device on which the tensor should be loaded.
+        pad_id (int, optional): ID used for padding. Defaults to 0.
+
+    Returns:
+        torch.Tensor: The padded token IDs.
+    """
+    lens = np.fromiter(
+        (len(t) for t in tokens), dtype=np.int64, count=len(tokens)
+    )
+    max_len = int(lens.max()) if len(tokens) else 0
+    out = np.full((len(tokens), max_len), pad_id, dtype=np.int64)
+    for i, t in enumerate(tokens):
+        out[i, : lens[i]] = t
+
+    tensor = torch.from_numpy(out)
+    if torch.device(device).type == "cuda":
+        return tensor.pin_memory().to(device, non_blocking=True)
+    return tensor.to(device)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_tiktokenizer(model_name: str = "o200k_base") -> TikTokenizer:
+    """
+    Returns a process-wide TikTokenizer for the given encoding, so the
+    BPE ranks are only loaded once.
+    """
+    return TikTokenizer(model_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_text_embedder(
+    vocab_size: int, embed_dim: int, device: torch.device
+) -> TextEmbeddingModel:
+    """
+    Returns a cached TextEmbeddingModel for the given vocab size, embedding
+    dimension and device, so the embedding table is allocated and
+    initialized once instead of on every call.
+    """
+    return (
+        TextEmbeddingModel(
+            vocab_size_text=vocab_size, text_embedding_dim=embed_dim
+        )
+        .to(device)
+        .eval()
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_genomic_embedder(
+    vocab_size: int, embed_dim: int, device: torch.device
+) -> GenomicEmbeddingModel:
+    """
+    Returns a cached GenomicEmbeddingModel for the given vocab size,
+    embedding dimension and device.
+    """
+    return (
+        GenomicEmbeddingModel(
+            vocab_size_genomic=vocab_size,
+            genomic_embedding_dim=embed_dim,
+        )
+        .to(device)
+        .eval()
+    )
+
+
+@torch.inference_mode()
 def embed_text(
     text: List[str],
     device: torch.device = torch.device("cpu"),
@@ -142,24 +241,20 @@ def embed_text(
     # text_input_ids = torch.tensor(
     #     [tokenizer.tokenize(t)["ids"] for t in text], dtype=torch.long
     # ).to(device)
-    tokens = TikTokenizer().batch_encode(text)
-    tokens_tensor = pad_sequence(
-        [torch.tensor(t, dtype=torch.long) for t in tokens],
-        batch_first=True,
-    ).to(device)
-    vocab_size = TikTokenizer().encoding.n_vocab
-    print(tokens_tensor.shape)
+    tokenizer = _get_tiktokenizer()
+    tokens = tokenizer.batch_encode(text)
+    tokens_tensor = _pad_token_ids(tokens, device)
+    vocab_size = tokenizer.encoding.n_vocab
 
     # Get text embeddings
-    text_embeddings = TextEmbeddingModel(
-        vocab_size_text=vocab_size, text_embedding_dim=embed_dim
-    )(tokens_tensor)
-    logger.info(f"Text embedding shape: {text_embeddings.shape}")
+    embedder = _get_text_embedder(vocab_size, embed_dim, device)
+    text_embeddings = embedder(tokens_tensor)
 
     logger.debug(f"Text embeddings shape: {text_embeddings.shape}")
     return text_embeddings
 
 
+@torch.inference_mode()
 def embed_genomic(
     sequences: List[str],
     tokenizer: GenomeTokenizer,
@@ -175,6 +270,7 @@ def embed_genomic(
         tokenizer (GenomeTokenizer): An instance of the GenomeTokenizer to tokenize genomic sequences.
         embedding_model (EmbeddingModel): The embedding model that contains genomic embedding logic.
         device (torch.device): Device on which the tensor should be loaded.
+        dim (int, optional): Genomic embedding dimension. Defaults to 128.
 
     Returns:
         torch.Tensor: A tensor containing the genomic embeddings.
@@ -188,14 +284,18 @@ def embed_genomic(
 
     # Convert the tokenized IDs into a tensor
     genomic_input_ids = [item["ids"] for item in tokenized_data]
-    genomic_input_ids = torch.tensor(genomic_input_ids).to(device)
-    # print(genomic_input_ids.shape)
+    pad_id = getattr(tokenizer, "pad_id", None)
+    genomic_input_ids = _pad_token_ids(
+        genomic_input_ids,
+        device,
+        pad_id=pad_id if pad_id is not None else 0,
+    )
 
     # Get genomic embeddings
-    with torch.no_grad():
-        genomic_embeddings = GenomicEmbeddingModel(
-            tokenizer.vocab_size, dim
-        )
+    embedder = _get_genomic_embedder(
+        tokenizer.vocab_size, dim if dim is not None else 128, device
+    )
+    genomic_embeddings = embedder(genomic_input_ids)
 
     logger.debug(
         f"Genomic embeddings shape: {genomic_embeddings.shape}"
@@ -1,4 +1,6 @@
 from tokenizers import (
+    Encoding,
+    Regex,
     Tokenizer,
     pre_tokenizers,
 )
@@ -6,7 +8,257 @@ from tokenizers.models import BPE
 from tokenizers.trainers import BpeTrainer
 from tokenizers.processors import TemplateProcessing
 from loguru import logger
-from typing import List
+import numpy as np
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Tuple,
+)
+import functools
+import json
+import os
+import queue
+import string
+import threading
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if TYPE_CHECKING:
+    import torch
+
+# tokenizers' BPE model only caches words shorter than this many characters
+_BPE_CACHE_MAX_WORD = 256
+
+# Upper bound on the training sequences re-encoded to warm the cache
+_WARM_SAMPLE_BYTES = 16 * 1024**2
+
+
+@functools.lru_cache(maxsize=8)
+def _read_tokenizer_json(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Reads a tokenizer JSON file, cached per process. The file modification
+    time and size are part of the cache key, so a rewritten file is read
+    again; the cache is bounded so superseded versions are evicted.
+    """
+    with open(path, encoding="utf-8") as f:
+        serialized = f.read()
+    if not serialized:
+        raise ValueError(f"Tokenizer model file {path} is empty")
+    return serialized
+
+
+def _pair_rank(left, right, keys, ranks, vocab_size):
+    """
+    Returns the merge rank of the (left, right) token pair, or -1 when the
+    pair is not in the merge table.
+    """
+    key = left * vocab_size + right
+    i = np.searchsorted(keys, key)
+    if i < len(keys) and keys[i] == key:
+        return ranks[i]
+    return -1
+
+
+def _bpe_merge_window(ids, keys, ranks, new_ids, vocab_size, out):
+    """
+    Applies the BPE merges to one pre-tokenized word, lowest rank first
+    and leftmost first on ties (the order the Rust BPE model uses), and
+    writes the merged IDs to out. Returns the number of IDs written.
+    """
+    n = len(ids)
+    if n == 0:
+        return 0
+    stride = n + 1
+    sym = ids.copy()
+    nxt = np.arange(1, n + 1)
+    prv = np.arange(-1, n - 1)
+    alive = np.ones(n, dtype=np.bool_)
+    # Binary min-heap of rank * stride + position
+    heap = np.empty(3 * n, dtype=np.int64)
+    size = 0
+    for pos in range(n - 1):
+        rank = _pair_rank(
+            sym[pos], sym[pos + 1], keys, ranks, vocab_size
+        )
+        if rank >= 0:
+            heap[size] = rank * stride + pos
+            size += 1
+    for i in range(size // 2 - 1, -1, -1):
+        j = i
+        while True:
+            c = 2 * j + 1
+            if c >= size:
+                break
+            if c + 1 < size and heap[c + 1] < heap[c]:
+                c += 1
+            if heap[j] <= heap[c]:
+                break
+            heap[j], heap[c] = heap[c], heap[j]
+            j = c
+
+    while size > 0:
+        top = heap[0]
+        size -= 1
+        heap[0] = heap[size]
+        j = 0
+        while True:
+            c = 2 * j + 1
+            if c >= size:
+                break
+            if c + 1 < size and heap[c + 1] < heap[c]:
+                c += 1
+            if heap[j] <= heap[c]:
+                break
+            heap[j], heap[c] = heap[c], heap[j]
+            j = c
+
+        rank = top // stride
+        pos = top % stride
+        right = nxt[pos]
+        # Skip entries made stale by an earlier merge
+        if not alive[pos] or right >= n:
+            continue
+        if (
+            _pair_rank(sym[pos], sym[right], keys, ranks, vocab_size)
+            != rank
+        ):
+            continue
+        sym[pos] = new_ids[rank]
+        alive[right] = False
+        nxt[pos] = nxt[right]
+        if nxt[pos] < n:
+            prv[nxt[pos]] = pos
+
+        for left in (prv[pos], pos):
+            if left < 0 or nxt[left] >= n:
+                continue
+            new_rank = _pair_rank(
+                sym[left], sym[nxt[left]], keys, ranks, vocab_size
+            )
+            if new_rank < 0:
+                continue
+            heap[size] = new_rank * stride + left
+            j = size
+            size += 1
+            while j > 0 and heap[(j - 1) // 2] > heap[j]:
+                heap[(j - 1) // 2], heap[j] = (
+                    heap[j],
+                    heap[(j - 1) // 2],
+                )
+                j = (j - 1) // 2
+
+    count = 0
+    pos = 0
+    while pos < n:
+        out[count] = sym[pos]
+        count += 1
+        pos = nxt[pos]
+    return count
+
+
+def _bpe_merge_numba(
+    nt_ids, starts, ends, keys, ranks, new_ids, vocab_size
+):
+    """
+    BPE-encodes a long ID array by merging its pre-tokenized words
+    nt_ids[starts[w]:ends[w]] in parallel. BPE merges each word
+    independently, so this is exact and needs no overlap between words.
+    """
+    n_words = len(starts)
+    out = np.empty(len(nt_ids), dtype=np.int32)
+    counts = np.zeros(n_words, dtype=np.int64)
+    for w in prange(n_words):
+        counts[w] = _bpe_merge_window(
+            nt_ids[starts[w] : ends[w]],
+            keys,
+            ranks,
+            new_ids,
+            vocab_size,
+            out[starts[w] : ends[w]],
+        )
+    merged = np.empty(counts.sum(), dtype=np.int32)
+    offset = 0
+    for w in range(n_words):
+        merged[offset : offset + counts[w]] = out[
+            starts[w] : starts[w] + counts[w]
+        ]
+        offset += counts[w]
+    return merged
+
+
+def _pretokenize_spans(byte_class, stride):
+    """
+    Reproduces the pre-tokenizer on an ASCII byte-class array (see
+    _BYTE_CLASS): Whitespace splits runs of word bytes from runs of other
+    non-space bytes and drops whitespace, then Split cuts every run into
+    stride-sized windows. Returns the word start and end indices.
+    """
+    if len(byte_class) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+    change = np.flatnonzero(np.diff(byte_class)) + 1
+    starts = np.concatenate(([0], change))
+    ends = np.concatenate((change, [len(byte_class)]))
+    keep = byte_class[starts] != 0
+    starts, ends = starts[keep], ends[keep]
+    counts = -(-(ends - starts) // stride)
+    first = np.cumsum(counts) - counts
+    window = np.arange(counts.sum()) - np.repeat(first, counts)
+    starts = np.repeat(starts, counts) + window * stride
+    ends = np.minimum(starts + stride, np.repeat(ends, counts))
+    return starts, ends
+
+
+# ASCII byte classes as the Whitespace pre-tokenizer (\w+|[^\w\s]+) sees
+# them: 0 whitespace, 1 word character, 2 anything else
+_BYTE_CLASS = np.full(256, 2, dtype=np.int8)
+_BYTE_CLASS[[9, 10, 11, 12, 13, 32]] = 0
+_BYTE_CLASS[
+    np.frombuffer(
+        (string.ascii_letters + string.digits + "_").encode(),
+        np.uint8,
+    )
+] = 1
+
+
+prange = range
+if numba is not None:
+    prange = numba.prange
+    _pair_rank = numba.njit(cache=True)(_pair_rank)
+    _bpe_merge_window = numba.njit(cache=True)(_bpe_merge_window)
+    _bpe_merge_numba = numba.njit(cache=True, parallel=True)(
+        _bpe_merge_numba
+    )
+
+
+class BatchBuffer:
+    """
+    Preallocated output arrays for GenomeTokenizer.tokenize_batch_into,
+    reused across batches.
+
+    Attributes:
+        ids (np.ndarray): The (max_batch, max_seq) int32 token IDs.
+        mask (np.ndarray): The matching (max_batch, max_seq) int8 attention mask.
+    """
+
+    def __init__(self, max_batch: int, max_seq: int):
+        """
+        Allocates the buffer arrays.
+
+        Args:
+            max_batch (int): Maximum number of sequences per batch.
+            max_seq (int): Number of tokens per row, including [START]/[END].
+        """
+        self.ids = np.empty((max_batch, max_seq), dtype=np.int32)
+        self.mask = np.empty((max_batch, max_seq), dtype=np.int8)
 
 
 class GenomeTokenizer:
@@ -16,55 +268,101 @@ class GenomeTokenizer:
 
     Attributes:
         vocab_size (int): Size of the vocabulary for subword tokenization.
-        special_tokens (List[str]): List of special tokens for padding, start, end, etc.
+        special_tokens (Tuple[str, ...]): Special tokens for padding, start, end, etc.
         model_path (str): Path to save the trained tokenizer model.
+        unk_id, pad_id, mask_id, start_id, end_id, ... (int): ID of each special token, e.g. pad_id for "[PAD]"; None until the tokenizer is trained or loaded.
     """
 
     def __init__(
         self,
-        vocab_size: int = 5000,
+        vocab_size: int = 1024,
         special_tokens: List[str] = None,
         model_path: str = "genomic_tokenizer.json",
         chunk_size: int = 1028,
+        cache_capacity: int = 100_000,
+        num_shards: int = 1,
+        pretokenize_stride: int = 255,
+        num_threads: int = None,
     ):
         """
         Initializes the GenomeTokenizer with a Byte Pair Encoding (BPE) model.
 
         Args:
-            vocab_size (int): Size of the vocabulary for subword tokenization (default 5000).
+            vocab_size (int): Size of the vocabulary for subword tokenization (default 1024). Genomic BPE vocabularies of
+                about 1024 tokens match or beat larger ones downstream, and smaller merge tables encode faster.
             special_tokens (List[str]): List of special tokens for padding, start, end, etc.
             model_path (str): Path to save the trained tokenizer model (default "genomic_tokenizer.json").
+            cache_capacity (int): Number of pre-tokenized words the BPE merge cache can hold (default 100000).
+            num_shards (int): Number of tokenizer clones that encode sub-batches on separate threads; 1 disables sharding (default 1).
+                Pair sharding with configure_parallelism to bound the shared thread pool.
+            pretokenize_stride (int): Maximum length in bases of a pre-tokenized word (default 255). The BPE merge cache only
+                holds words shorter than 256 characters, so larger strides bypass it.
+            num_threads (int, optional): Size of the tokenizers thread pool, see configure_parallelism (default all cores).
         """
         self.vocab_size = vocab_size
-        self.special_tokens = special_tokens
         self.chunk_size = chunk_size
-        self.special_tokens = special_tokens or [
-            "[UNK]",
-            "[PAD]",
-            "[MASK]",
-            "[START]",
-            "[END]",
-            "[SNP]",
-            "[INS]",
-            "[DEL]",
-        ]
+        self.special_tokens = tuple(
+            special_tokens
+            or (
+                "[UNK]",
+                "[PAD]",
+                "[MASK]",
+                "[START]",
+                "[END]",
+                "[SNP]",
+                "[INS]",
+                "[DEL]",
+            )
+        )
         self.model_path = model_path
+        self.cache_capacity = cache_capacity
+        self.num_shards = num_shards
+        self.pretokenize_stride = pretokenize_stride
+        self.fixed_length = None
+        self._nt_lut = None
+        self._merge_table = None
+        self._save_thread = None
+        self._save_error = None
+        self._shards = []
+        self._executor = None
 
         logger.info("Initializing GenomeTokenizer...")
 
-        # Initialize BPE Tokenizer
-        self.tokenizer = Tokenizer(BPE())
+        if num_threads is not None:
+            self.configure_parallelism(num_threads)
+
+        # Initialize BPE Tokenizer. Genomic inputs repeat the same fragments
+        # (repeats, motifs, homopolymer runs), so a large merge cache turns
+        # most re-encodes into a single lookup.
+        self.tokenizer = Tokenizer(BPE(cache_capacity=cache_capacity))
+        self._encode = self.tokenizer.encode
+        self._cache_special_ids()
         logger.info(
             f"Initialized BPE tokenizer with vocab size {self.vocab_size}"
         )
 
-        # Set pre-tokenizer for splitting sequences (whitespace pre-tokenizer)
-        self.tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+        # Set pre-tokenizer for splitting sequences on whitespace, then into
+        # fixed-stride windows. Genomic sequences rarely contain whitespace,
+        # and BPE merging a whole sequence as one word is quadratic in its
+        # length; windows bound that cost per word. Windows of at most 255
+        # bases also stay within the words the merge cache will store.
+        self.tokenizer.pre_tokenizer = pre_tokenizers.Sequence(
+            [
+                pre_tokenizers.Whitespace(),
+                pre_tokenizers.Split(
+                    Regex(f".{{1,{pretokenize_stride}}}"),
+                    behavior="isolated",
+                ),
+            ]
+        )
         logger.info(
-            "Pre-tokenizer for splitting sequences based on whitespace set."
+            "Pre-tokenizer for splitting sequences based on whitespace and "
+            f"a stride of {pretokenize_stride} set."
         )
 
-        # Set post-processor to add start and end tokens
+        # Set post-processor to add start and end tokens. Their IDs are
+        # only known once the vocabulary exists; _set_post_processor fixes
+        # them up after training or loading.
         self.tokenizer.post_processor = TemplateProcessing(
             single="[START] $A [END]",
             pair="[START] $A $B [END]",
@@ -72,42 +370,260 @@ class GenomeTokenizer:
         )
         logger.info("Post-processor for start and end tokens set.")
 
-    def train(self, sequences: List[str]):
+    @classmethod
+    def configure_parallelism(cls, num_threads: int = None):
+        """
+        Enables the tokenizers thread pool and optionally bounds its size.
+
+        Nothing is changed on import: left unset, tokenizers already uses
+        the pool and disables it in processes forked after it was used. An
+        explicit TOKENIZERS_PARALLELISM=true removes that safeguard, and a
+        forked child that encodes a batch can then deadlock. So only call
+        this when no process is forked after the first batch encode, e.g.
+        not with a PyTorch DataLoader using num_workers > 0 and the
+        default fork start method.
+
+        The pool is created on first use, so call this before the first
+        batch encode.
+
+        Args:
+            num_threads (int, optional): Number of threads in the pool (default all cores).
+        """
+        os.environ["TOKENIZERS_PARALLELISM"] = "true"
+        if num_threads is not None:
+            os.environ["RAYON_NUM_THREADS"] = str(num_threads)
+
+    def train(self, sequences: Iterable[str], length: int = None):
         """
         Trains the tokenizer on the provided genomic sequences.
 
+        sequences may be any iterable, including a generator streaming from
+        disk (see train_from_files), so the corpus never has to fit in
+        memory. For very large corpora, a datasets.Dataset mapped with
+        batched=True and num_proc=os.cpu_count() can feed this iterator.
+
         Args:
-            sequences (List[str]): List of genomic sequences to train the tokenizer.
+            sequences (Iterable[str]): Genomic sequences to train the tokenizer.
+            length (int, optional): Number of sequences, used for progress reporting when sequences has no len().
         """
+        if length is None and hasattr(sequences, "__len__"):
+            length = len(sequences)
         logger.info(
-            f"Training tokenizer with {len(sequences)} sequences..."
+            f"Training tokenizer with {length if length is not None else 'a stream of'} sequences..."
         )
 
+        # A list can be scanned again for its most frequent sequences; a
+        # stream is consumed by training, so keep a sample of it, bounded
+        # in bytes so a few chromosome-sized records are not all retained
+        if isinstance(sequences, list):
+            warm_sequences = None
+        else:
+            warm_sequences = []
+
+            def stream(sequences=sequences):
+                budget = _WARM_SAMPLE_BYTES
+                for seq in sequences:
+                    if (
+                        len(seq) <= budget
+                        and len(warm_sequences) < self.cache_capacity
+                    ):
+                        warm_sequences.append(seq)
+                        budget -= len(seq)
+                    yield seq
+
+            sequences = stream()
+
         trainer = BpeTrainer(
             vocab_size=self.vocab_size,
-            special_tokens=self.special_tokens,
+            special_tokens=list(self.special_tokens),
         )
-        self.tokenizer.train_from_iterator(sequences, trainer=trainer)
+        self.tokenizer.train_from_iterator(
+            sequences, trainer=trainer, length=length
+        )
+        # The trainer may stop short of the requested size
+        self.vocab_size = self.tokenizer.get_vocab_size()
+        self._cache_special_ids()
+        self._set_post_processor()
         logger.info(
             f"Tokenizer trained with a vocabulary size of {self.vocab_size}"
         )
 
-        # Save the trained tokenizer
-        self.save_tokenizer()
+        # Warm the merge cache with the most frequent training sequences;
+        # pointless when the windows are too long for the cache to store
+        if self.pretokenize_stride >= _BPE_CACHE_MAX_WORD:
+            warm_sequences = []
+        elif warm_sequences is None:
+            warm_sequences = []
+            budget = _WARM_SAMPLE_BYTES
+            for seq, _ in Counter(sequences).most_common(
+                self.cache_capacity
+            ):
+                if len(seq) <= budget:
+                    warm_sequences.append(seq)
+                    budget -= len(seq)
+        self.tokenizer.encode_batch(warm_sequences)
+
+        # Save the trained tokenizer; the file write happens off-thread
+        self.save_tokenizer(background=True)
+        self._build_shards()
+        self._build_nt_lut()
+        self._build_merge_table()
+
+    def train_from_files(self, paths: List[str]):
+        """
+        Trains the tokenizer by streaming sequence lines from FASTA or
+        plain-text files. FASTA header lines (starting with ">") and blank
+        lines are skipped.
+
+        Args:
+            paths (List[str]): Paths to FASTA or one-sequence-per-line files.
+        """
+
+        def read_sequences():
+            for path in paths:
+                with open(path) as f:
+                    for line in f:
+                        line = line.strip()
+                        if line and not line.startswith(">"):
+                            yield line
+
+        self.train(read_sequences())
+
+    def train_incremental(
+        self, new_vocab_size: int, sequences: List[str] = None
+    ):
+        """
+        Moves the trained tokenizer to a different vocabulary size.
 
-    def save_tokenizer(self):
+        BPE vocabularies trained on the same corpus are nested: the first k
+        merges of a larger vocabulary are exactly the merges of the smaller
+        one. Shrinking therefore truncates the merge list without training.
+        Growing requires retraining on sequences.
+
+        Args:
+            new_vocab_size (int): The target vocabulary size.
+            sequences (List[str], optional): Training sequences, required when growing the vocabulary.
+        """
+        if new_vocab_size > self.tokenizer.get_vocab_size():
+            if sequences is None:
+                raise ValueError(
+                    "sequences are required to grow the vocabulary"
+                )
+            self.vocab_size = new_vocab_size
+            self.train(sequences)
+            return
+
+        logger.info(
+            f"Truncating vocabulary from {self.tokenizer.get_vocab_size()} "
+            f"to {new_vocab_size} tokens without retraining"
+        )
+        state = json.loads(self.tokenizer.to_str())
+        model = state["model"]
+        # The trainer assigns IDs in merge order, so the smaller vocabulary
+        # is an ID prefix and its merges are those producing kept tokens
+        vocab = {
+            token: token_id
+            for token, token_id in model["vocab"].items()
+            if token_id < new_vocab_size
+        }
+        model["vocab"] = vocab
+        model["merges"] = [
+            merge
+            for merge in model["merges"]
+            if "".join(
+                merge if isinstance(merge, list) else merge.split(" ")
+            )
+            in vocab
+        ]
+        self.tokenizer = Tokenizer.from_str(json.dumps(state))
+        self._encode = self.tokenizer.encode
+        if hasattr(self.tokenizer.model, "_resize_cache"):
+            self.tokenizer.model._resize_cache(self.cache_capacity)
+        self.vocab_size = new_vocab_size
+
+        self.save_tokenizer(background=True)
+        self._build_shards()
+        self._build_nt_lut()
+        self._build_merge_table()
+
+    def save_tokenizer(self, background: bool = False):
         """
         Saves the trained tokenizer to the specified model path.
+
+        The tokenizer is serialized on the calling thread, so later changes
+        to it never race with the save; with background=True only the file
+        write is handed to a worker thread. Call wait_for_save to block
+        until it has finished; a failed background write is raised from
+        wait_for_save, or from the next save_tokenizer or load_tokenizer.
+
+        Args:
+            background (bool): Write the file on a background thread (default False).
         """
-        self.tokenizer.save(self.model_path)
-        logger.info(f"Tokenizer saved to {self.model_path}")
+        serialized = self.tokenizer.to_str(pretty=True)
+        # Keep at most one write in flight so saves land in order
+        self.wait_for_save()
+        if not background:
+            self._write_tokenizer(serialized, self.model_path)
+            return
+        self._save_thread = threading.Thread(
+            target=self._write_tokenizer_background,
+            args=(serialized, self.model_path),
+        )
+        self._save_thread.start()
+
+    def _write_tokenizer_background(self, serialized: str, path: str):
+        # Keep the error for wait_for_save to raise in the caller's thread
+        try:
+            self._write_tokenizer(serialized, path)
+        except Exception as e:
+            self._save_error = e
+
+    @staticmethod
+    def _write_tokenizer(serialized: str, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(serialized)
+        logger.info(f"Tokenizer saved to {path}")
+
+    def wait_for_save(self):
+        """
+        Blocks until a background save_tokenizer write has finished, and
+        raises the exception it failed with, if any.
+        """
+        if self._save_thread is not None:
+            self._save_thread.join()
+            self._save_thread = None
+        if self._save_error is not None:
+            error, self._save_error = self._save_error, None
+            raise error
 
     def load_tokenizer(self):
         """
         Loads the tokenizer from the specified model path.
         """
+        # Do not read a file that is still being written
+        self.wait_for_save()
         try:
-            self.tokenizer = Tokenizer.from_file(self.model_path)
+            stat = os.stat(self.model_path)
+            self.tokenizer = Tokenizer.from_str(
+                _read_tokenizer_json(
+                    self.model_path, stat.st_mtime_ns, stat.st_size
+                )
+            )
+            self._encode = self.tokenizer.encode
+            # The loaded file, not the constructor default, sets the size
+            self.vocab_size = self.tokenizer.get_vocab_size()
+            self._cache_special_ids()
+            self._set_post_processor()
+            if self.fixed_length is not None:
+                self._apply_fixed_shape()
+            # The cache size is not serialized with the model
+            if hasattr(self.tokenizer.model, "_resize_cache"):
+                self.tokenizer.model._resize_cache(
+                    self.cache_capacity
+                )
+            self._build_shards()
+            self._build_nt_lut()
+            self._build_merge_table()
             logger.info(f"Tokenizer loaded from {self.model_path}")
         except FileNotFoundError:
             logger.error(
@@ -115,21 +631,326 @@ class GenomeTokenizer:
             )
             raise
 
-    def tokenize(self, sequence: str):
+    def _build_shards(self):
+        """
+        Clones the tokenizer into num_shards independent tokenizers for
+        sharded batch encoding.
+
+        On high core-count machines a single encode_batch plateaus on
+        contention inside its shared thread pool; giving each shard a
+        sub-batch and its own thread scales further. The shards still share
+        the library's process-wide thread pool, which is left alone here;
+        to keep them from oversubscribing cores, bound it with
+        configure_parallelism(num_threads) or set TOKENIZERS_PARALLELISM
+        to "false" before the first encode.
+        """
+        if self.num_shards <= 1:
+            self._shards = []
+            return
+        serialized = self.tokenizer.to_str()
+        self._shards = [
+            Tokenizer.from_str(serialized)
+            for _ in range(self.num_shards)
+        ]
+        for shard in self._shards:
+            if hasattr(shard.model, "_resize_cache"):
+                shard.model._resize_cache(self.cache_capacity)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.num_shards
+            )
+
+    def _build_nt_lut(self):
+        """
+        Builds a 256-entry byte -> token ID lookup table for the single
+        nucleotide tokens, used by tokenize_nt. Bytes without a
+        single-nucleotide token map to [UNK]; lowercase bases map to the
+        uppercase token.
+        """
+        unk_id = getattr(self, "unk_id", None)
+        self._nt_lut = np.full(
+            256, unk_id if unk_id is not None else 0, dtype=np.int32
+        )
+        for base in "ACGTN":
+            token_id = self.tokenizer.token_to_id(base)
+            if token_id is not None:
+                self._nt_lut[ord(base)] = token_id
+                self._nt_lut[ord(base.lower())] = token_id
+
+    def _build_merge_table(self):
+        """
+        Materializes the BPE merges as sorted int64 pair keys
+        (left * vocab_size + right) with their ranks and merged token IDs,
+        plus a byte -> single-character token ID table (-1 when there is
+        none), for the Numba path of tokenize_long. Skipped without numba.
+        """
+        if numba is None:
+            return
+        model = json.loads(self.tokenizer.to_str())["model"]
+        vocab = model["vocab"]
+        vocab_size = self.tokenizer.get_vocab_size()
+        pair_keys, new_ids = [], []
+        for merge in model["merges"]:
+            left, right = (
+                merge if isinstance(merge, list) else merge.split(" ")
+            )
+            pair_keys.append(vocab[left] * vocab_size + vocab[right])
+            new_ids.append(vocab[left + right])
+        pair_keys = np.asarray(pair_keys, dtype=np.int64)
+        order = np.argsort(pair_keys)
+        byte_lut = np.full(256, -1, dtype=np.int32)
+        for token, token_id in vocab.items():
+            if len(token) == 1 and ord(token) < 128:
+                byte_lut[ord(token)] = token_id
+        self._merge_table = (
+            byte_lut,
+            pair_keys[order],
+            order.astype(np.int64),
+            np.asarray(new_ids, dtype=np.int32),
+            vocab_size,
+        )
+
+    def _cache_special_ids(self):
+        """
+        Stores the ID of every special token as an attribute ("[PAD]" ->
+        self.pad_id, ...), so hot paths avoid a token_to_id call.
+        """
+        for name in self.special_tokens:
+            setattr(
+                self,
+                name.strip("[]").lower() + "_id",
+                self.tokenizer.token_to_id(name),
+            )
+
+    def _set_post_processor(self):
+        """
+        Points the [START]/[END] post-processor at the IDs those tokens
+        actually have in the vocabulary.
+        """
+        start_id = getattr(self, "start_id", None)
+        end_id = getattr(self, "end_id", None)
+        if start_id is None or end_id is None:
+            return
+        self.tokenizer.post_processor = TemplateProcessing(
+            single="[START] $A [END]",
+            pair="[START] $A $B [END]",
+            special_tokens=[("[START]", start_id), ("[END]", end_id)],
+        )
+
+    def _encode_batch(
+        self, sequences: List[str], add_special_tokens: bool = True
+    ):
+        """
+        Encodes a batch with encode_batch, split across the tokenizer shards
+        when sharding is enabled.
+        """
+        if len(self._shards) <= 1 or len(sequences) < len(
+            self._shards
+        ):
+            return self.tokenizer.encode_batch(
+                sequences, add_special_tokens=add_special_tokens
+            )
+        chunk = -(-len(sequences) // len(self._shards))
+        futures = [
+            self._executor.submit(
+                shard.encode_batch,
+                sequences[i * chunk : (i + 1) * chunk],
+                add_special_tokens=add_special_tokens,
+            )
+            for i, shard in enumerate(self._shards)
+        ]
+        return [e for future in futures for e in future.result()]
+
+    def _encode_batch_unwrapped(self, sequences: List[str]):
+        """
+        Encodes a batch without the [START]/[END] post-processor when the
+        caller can write those tokens itself. Returns the encodings and the
+        number of tokens (0 or 1) to add on each side.
+        """
+        # Under configure_fixed_shape the post-processor must wrap before
+        # padding, otherwise [END] would land after the pad tokens
+        if (
+            getattr(self, "start_id", None) is None
+            or getattr(self, "end_id", None) is None
+            or self.fixed_length is not None
+        ):
+            return self._encode_batch(sequences), 0
+        return (
+            self._encode_batch(sequences, add_special_tokens=False),
+            1,
+        )
+
+    def configure_fixed_shape(self, length: int):
+        """
+        Pads and truncates every encoding to a fixed number of tokens, so
+        batches come out of the tokenizer with a known (batch, length) shape.
+
+        The setting survives load_tokenizer, which re-applies it to the
+        loaded tokenizer.
+
+        Args:
+            length (int): Number of tokens per encoded sequence.
+        """
+        if getattr(self, "pad_id", None) is None:
+            raise ValueError(
+                "The tokenizer must be trained or loaded before "
+                "configure_fixed_shape"
+            )
+        self.fixed_length = length
+        self._apply_fixed_shape()
+        # Shards are clones and would not see the new settings
+        self._build_shards()
+        logger.info(f"Fixed-shape encoding set to {length} tokens")
+
+    def _apply_fixed_shape(self):
+        """
+        Enables [PAD] padding and truncation to self.fixed_length on the
+        tokenizer; padding settings are not kept when it is replaced.
+        """
+        self.tokenizer.enable_padding(
+            length=self.fixed_length,
+            pad_id=self.pad_id,
+            pad_token="[PAD]",
+        )
+        self.tokenizer.enable_truncation(max_length=self.fixed_length)
+
+    def tokenize(self, sequence: str) -> Encoding:
         """
         Tokenizes a given genomic sequence.
 
+        Args:
+            sequence (str): Genomic sequence to tokenize.
+
+        Returns:
+            Encoding: The encoding; read .tokens and .ids from it as needed.
+        """
+        logger.opt(lazy=True).debug(
+            "Tokenizing sequence of length {}", lambda: len(sequence)
+        )
+        encoded = self._encode(sequence)
+        logger.opt(lazy=True).debug(
+            "Tokenized sequence: {}", lambda: encoded.tokens
+        )
+        return encoded
+
+    def tokenize_dict(self, sequence: str):
+        """
+        Tokenizes a given genomic sequence into a dictionary.
+
         Args:
             sequence (str): Genomic sequence to tokenize.
 
         Returns:
             Dict[str, Any]: A dictionary containing tokenized sequence and token IDs.
         """
-        logger.info(f"Tokenizing sequence of length {len(sequence)}")
-        encoded = self.tokenizer.encode(sequence)
-        logger.debug(f"Tokenized sequence: {encoded.tokens}")
+        encoded = self.tokenize(sequence)
         return {"tokens": encoded.tokens, "ids": encoded.ids}
 
+    def tokenize_nt(self, sequence: str) -> np.ndarray:
+        """
+        Tokenizes a genomic sequence at single-nucleotide resolution.
+
+        Each base maps to its single-character token through a byte lookup
+        table, bypassing the BPE merges entirely; no [START]/[END] tokens
+        are added. Use this for base-resolution tasks, and tokenize for
+        subword tokens.
+
+        Args:
+            sequence (str): Genomic sequence to tokenize.
+
+        Returns:
+            np.ndarray: The int32 token IDs, one per base.
+        """
+        if self._nt_lut is None:
+            raise ValueError(
+                "The tokenizer must be trained or loaded before tokenize_nt"
+            )
+        return self._nt_lut[
+            np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+        ]
+
+    def tokenize_nt_batch(
+        self, sequences: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes a batch of genomic sequences at single-nucleotide
+        resolution with a single lookup over the concatenated bytes.
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The flat int32 token IDs and the int64 offsets, laid out as in tokenize_batch_ids.
+        """
+        if self._nt_lut is None:
+            raise ValueError(
+                "The tokenizer must be trained or loaded before tokenize_nt_batch"
+            )
+        offsets = np.zeros(len(sequences) + 1, dtype=np.int64)
+        np.cumsum([len(seq) for seq in sequences], out=offsets[1:])
+        buf = np.frombuffer(
+            "".join(sequences).encode("ascii"), dtype=np.uint8
+        )
+        return self._nt_lut[buf], offsets
+
+    def tokenize_long(self, sequence: str) -> np.ndarray:
+        """
+        Tokenizes one very long genomic sequence, such as a whole
+        chromosome, into int32 token IDs wrapped in [START]/[END].
+
+        The Rust tokenizer encodes a single sequence on one thread. When
+        numba is installed, the sequence is instead split into the same
+        words as the pre-tokenizer (at whitespace, between bases and gap
+        characters such as "-", then into pretokenize_stride windows) and
+        the BPE merges run on those words in a compiled kernel, in parallel
+        across cores, with the same result. Without numba, or for sequences
+        containing characters with no single-character token (lowercase
+        bases, non-ASCII, ...), it falls back to the Rust tokenizer.
+
+        Args:
+            sequence (str): Genomic sequence to tokenize.
+
+        Returns:
+            np.ndarray: The int32 token IDs.
+        """
+        if (
+            self._merge_table is not None
+            and self.fixed_length is None
+            and sequence.isascii()
+        ):
+            byte_lut, keys, ranks, new_ids, vocab_size = (
+                self._merge_table
+            )
+            buf = np.frombuffer(
+                sequence.encode("ascii"), dtype=np.uint8
+            )
+            byte_class = _BYTE_CLASS[buf]
+            nt_ids = byte_lut[buf]
+            # Whitespace is dropped; every other byte needs a token
+            if not (nt_ids[byte_class != 0] < 0).any():
+                starts, ends = _pretokenize_spans(
+                    byte_class, self.pretokenize_stride
+                )
+                merged = _bpe_merge_numba(
+                    nt_ids,
+                    starts,
+                    ends,
+                    keys,
+                    ranks,
+                    new_ids,
+                    vocab_size,
+                )
+                start_id = getattr(self, "start_id", None)
+                end_id = getattr(self, "end_id", None)
+                if start_id is None or end_id is None:
+                    return merged
+                ids = np.empty(len(merged) + 2, dtype=np.int32)
+                ids[0] = start_id
+                ids[1:-1] = merged
+                ids[-1] = end_id
+                return ids
+        return np.asarray(self._encode(sequence).ids, dtype=np.int32)
+
     def detokenize(self, token_ids: List[int]):
         """
         Detokenizes the given token IDs back into a genomic sequence.
@@ -140,11 +961,12 @@ class GenomeTokenizer:
         Returns:
             str: The detokenized genomic sequence.
         """
-        logger.info(
-            f"Detokenizing sequence from {len(token_ids)} token IDs"
+        logger.opt(lazy=True).debug(
+            "Detokenizing sequence from {} token IDs",
+            lambda: len(token_ids),
         )
         sequence = self.tokenizer.decode(token_ids)
-        logger.debug(f"Detokenized sequence: {sequence}")
+        logger.debug("Detokenized sequence: {}", sequence)
         return sequence
 
     def tokenize_batch(self, sequences: List[str]):
@@ -157,11 +979,226 @@ class GenomeTokenizer:
         Returns:
             List[Dict[str, Any]]: List of tokenized sequences with token IDs.
         """
-        logger.info(
-            f"Tokenizing a batch of {len(sequences)} sequences."
+        logger.opt(lazy=True).debug(
+            "Tokenizing a batch of {} sequences.",
+            lambda: len(sequences),
+        )
+        # encode_batch runs on the Rust-side thread pool (which honours
+        # TOKENIZERS_PARALLELISM) instead of one FFI call per sequence
+        encodings = self._encode_batch(sequences)
+        return [{"tokens": e.tokens, "ids": e.ids} for e in encodings]
+
+    def tokenize_batch_ids(
+        self, sequences: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes a batch of genomic sequences into one flat int32 ID array.
+
+        Sequence i occupies ids[offsets[i]:offsets[i + 1]]. Compared with
+        tokenize_batch this skips the per-token Python objects and halves
+        the bytes copied to the device; widen with a single .long() on the
+        device side. The [START]/[END] wrapping is written straight into
+        the output rather than by the post-processor, saving a pass over
+        every encoding.
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The flat int32 token IDs and the int64 offsets (length len(sequences) + 1).
+        """
+        encodings, wrap = self._encode_batch_unwrapped(sequences)
+        offsets = np.zeros(len(encodings) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(e.ids) + 2 * wrap for e in encodings],
+            out=offsets[1:],
         )
-        tokenized_batch = [self.tokenize(seq) for seq in sequences]
-        return tokenized_batch
+        ids = np.empty(offsets[-1], dtype=np.int32)
+        if wrap:
+            ids[offsets[:-1]] = self.start_id
+            ids[offsets[1:] - 1] = self.end_id
+        for i, e in enumerate(encodings):
+            ids[offsets[i] + wrap : offsets[i + 1] - wrap] = e.ids
+        return ids, offsets
+
+    def tokenize_batch_fixed(
+        self, sequences: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes a batch of genomic sequences into fixed-shape arrays.
+        Requires configure_fixed_shape to have been called.
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The (batch, length) int32 token IDs and the matching int8 attention mask.
+        """
+        if self.fixed_length is None:
+            raise ValueError(
+                "configure_fixed_shape must be called before tokenize_batch_fixed"
+            )
+        encodings = self._encode_batch(sequences)
+        ids = np.empty(
+            (len(encodings), self.fixed_length), dtype=np.int32
+        )
+        mask = np.empty(
+            (len(encodings), self.fixed_length), dtype=np.int8
+        )
+        for i, e in enumerate(encodings):
+            ids[i] = e.ids
+            mask[i] = e.attention_mask
+        return ids, mask
+
+    def tokenize_batch_into(
+        self, sequences: List[str], buf: "BatchBuffer"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes a batch of genomic sequences into the preallocated arrays
+        of a BatchBuffer, padding each row with [PAD] to the buffer length.
+        Reusing one buffer across batches of steady shape avoids allocating
+        fresh output arrays per batch.
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+            buf (BatchBuffer): The buffer to write into.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Views of buf.ids and buf.mask holding the first len(sequences) rows.
+        """
+        max_batch, max_seq = buf.ids.shape
+        if len(sequences) > max_batch:
+            raise ValueError(
+                f"Batch of {len(sequences)} sequences exceeds the "
+                f"buffer's {max_batch} rows"
+            )
+        pad_id = getattr(self, "pad_id", None)
+        pad_id = 0 if pad_id is None else pad_id
+        ids = buf.ids[: len(sequences)]
+        mask = buf.mask[: len(sequences)]
+
+        encodings, wrap = self._encode_batch_unwrapped(sequences)
+        for i, e in enumerate(encodings):
+            end = len(e.ids) + wrap
+            if end + wrap > max_seq:
+                raise ValueError(
+                    f"Sequence {i} has {end + wrap} tokens, more than "
+                    f"the buffer's {max_seq}"
+                )
+            ids[i, wrap:end] = e.ids
+            if wrap:
+                ids[i, 0] = self.start_id
+                ids[i, end] = self.end_id
+                end += 1
+            ids[i, end:] = pad_id
+            if self.fixed_length is None:
+                mask[i, :end] = 1
+            else:
+                mask[i, :end] = e.attention_mask
+            mask[i, end:] = 0
+        return ids, mask
+
+    def tokenize_batch_torch(
+        self, sequences: List[str]
+    ) -> "torch.Tensor":
+        """
+        Tokenizes a batch of genomic sequences into a padded (batch, length)
+        int32 tensor ready for the GPU. The tensor is allocated in pinned
+        memory when CUDA is available, so .to(device, non_blocking=True)
+        is a true async copy; padding uses [PAD] and the length is the
+        longest sequence (or the configure_fixed_shape length).
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+
+        Returns:
+            torch.Tensor: The (batch, length) int32 token IDs.
+        """
+        # Imported here so the tokenizer does not require torch
+        import torch
+
+        ids, offsets = self.tokenize_batch_ids(sequences)
+        lengths = np.diff(offsets)
+        max_len = int(lengths.max()) if len(lengths) else 0
+        pad_id = getattr(self, "pad_id", None)
+        out = torch.full(
+            (len(lengths), max_len),
+            0 if pad_id is None else pad_id,
+            dtype=torch.int32,
+            pin_memory=torch.cuda.is_available(),
+        )
+        # Row-major boolean scatter: the flat ids are already in row order
+        out.numpy()[np.arange(max_len) < lengths[:, None]] = ids
+        return out
+
+    def tokenize_batch_streaming(
+        self,
+        sequences: List[str],
+        chunk_size: int = None,
+        device_callback: Callable = None,
+    ) -> Iterator:
+        """
+        Tokenizes a batch in micro-batches, encoding the next micro-batch on
+        a worker thread while the caller consumes the current one.
+
+        Pass a device_callback that issues an asynchronous host-to-device
+        copy (e.g. torch.from_numpy(ids).pin_memory().to(device,
+        non_blocking=True) on a side CUDA stream) to overlap the transfer of
+        micro-batch k with the encoding of micro-batch k + 1.
+
+        Args:
+            sequences (List[str]): List of genomic sequences to tokenize.
+            chunk_size (int, optional): Sequences per micro-batch (default self.chunk_size).
+            device_callback (Callable, optional): Called as device_callback(ids, offsets) on each micro-batch in the caller's thread; its return value is yielded instead.
+
+        Yields:
+            The (ids, offsets) pair of each micro-batch, as returned by tokenize_batch_ids, or the device_callback result.
+        """
+        chunk_size = chunk_size or self.chunk_size
+        # Two slots: one micro-batch being consumed, one ready behind it
+        chunks = queue.Queue(maxsize=2)
+        done = object()
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def produce():
+            try:
+                for start in range(0, len(sequences), chunk_size):
+                    if stop.is_set():
+                        return
+                    put(
+                        self.tokenize_batch_ids(
+                            sequences[start : start + chunk_size]
+                        )
+                    )
+            except Exception as e:
+                put(e)
+            put(done)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield (
+                    device_callback(*item)
+                    if device_callback is not None
+                    else item
+                )
+        finally:
+            stop.set()
+            producer.join()
 
     def detokenize_batch(self, batch_ids: List[List[int]]):
         """
@@ -173,13 +1210,11 @@ class GenomeTokenizer:
         Returns:
             List[str]: List of detokenized genomic sequences.
         """
-        logger.info(
-            f"Detokenizing a batch of {len(batch_ids)} token sequences."
+        logger.opt(lazy=True).debug(
+            "Detokenizing a batch of {} token sequences.",
+            lambda: len(batch_ids),
         )
-        detokenized_batch = [
-            self.detokenize(ids) for ids in batch_ids
-        ]
-        return detokenized_batch
+        return self.tokenizer.decode_batch(batch_ids)
 
 
 # # Initialize the GenomeTokenizer with a vocabulary size of 5000
@@ -203,7 +1238,7 @@ class GenomeTokenizer:
 # print(tokenized_seq)
 
 # # Detokenize back to sequence
-# detokenized_seq = tokenizer.detokenize(tokenized_seq["ids"])
+# detokenized_seq = tokenizer.detokenize(tokenized_seq.ids)
 # print(detokenized_seq)
 
 # # Tokenize a batch of sequences
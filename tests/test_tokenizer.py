@@ -0,0 +1,70 @@
+import random
+
+import numpy as np
+import pytest
+
+import prometheus.tokenizer as tokenizer_module
+from prometheus.tokenizer import GenomeTokenizer
+
+
+@pytest.fixture
+def tokenizer(tmp_path, monkeypatch):
+    # Without numba the merge kernel runs as plain Python; the merge table
+    # is only built when numba is present, so pretend it is
+    if tokenizer_module.numba is None:
+        monkeypatch.setattr(tokenizer_module, "numba", True)
+    rng = random.Random(0)
+    sequences = [
+        "".join(rng.choice("ACGT") for _ in range(300))
+        for _ in range(100)
+    ]
+    # Gapped alignment rows
+    sequences += [
+        "".join(rng.choice("ACGT--*") for _ in range(300))
+        for _ in range(100)
+    ]
+    tokenizer = GenomeTokenizer(
+        vocab_size=400,
+        model_path=str(tmp_path / "tokenizer.json"),
+        pretokenize_stride=64,
+    )
+    tokenizer.train(sequences)
+    tokenizer.wait_for_save()
+    assert tokenizer._merge_table is not None
+    return tokenizer
+
+
+@pytest.mark.parametrize(
+    "sequence",
+    [
+        "".join(random.Random(1).choice("ACGT") for _ in range(5000)),
+        "AAAA-" + "A" * 2000,
+        "ACGT-ACGT--AAAA" * 100,
+        "ACGT*-*ACGT" * 50,
+        "ACGT ACGT\nACGT\t" + "C" * 300,
+        "-" * 200,
+        "",
+    ],
+    ids=[
+        "random",
+        "gap-prefix",
+        "gapped-repeat",
+        "mixed-gaps",
+        "whitespace",
+        "all-gaps",
+        "empty",
+    ],
+)
+def test_tokenize_long_matches_tokenize(tokenizer, sequence):
+    np.testing.assert_array_equal(
+        tokenizer.tokenize_long(sequence),
+        tokenizer.tokenize(sequence).ids,
+    )
+
+
+def test_tokenize_long_falls_back_on_unknown_bytes(tokenizer):
+    sequence = "ACGTacgt" * 50
+    np.testing.assert_array_equal(
+        tokenizer.tokenize_long(sequence),
+        tokenizer.tokenize(sequence).ids,
+    )